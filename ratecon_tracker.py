@@ -1,14 +1,15 @@
 import streamlit as st
 import pandas as pd
-import pdfplumber
+import numpy as np
 from datetime import datetime
 from io import BytesIO
 import re
-import plotly.express as px
 from dataclasses import dataclass
 import logging
-import gspread
-from gspread_dataframe import set_with_dataframe
+import os
+import hashlib
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # --- Logging Configuration ---
 logging.basicConfig(level=logging.INFO)
@@ -21,9 +22,15 @@ class Config:
     SHEET_NAME = "RateConTrackerData"
     WORKSHEET_NAME = "Sheet1"
     DEFAULT_CUSTOMER = "Covenant"
+    DEFAULT_STATUS = "Active"
     DRAYAGE_RATE = 400
     CHASSIS_RATE = 35
     MAX_FILE_SIZE = 200 * 1024 * 1024  # 200MB
+    MAX_WORKERS = 8  # upper bound on PDF parsing processes
+    EXTRACTION_CACHE_SIZE = 512  # parsed PDFs remembered by content hash
+    APPEND_CHUNK_SIZE = 500  # rows per append request
+    LOG_TTL = 60  # seconds before the log is re-fetched from Google Sheets
+    LOCAL_CACHE_FILE = ".ratecon_cache.parquet"
     COLUMNS = [
         "Date Added",
         "Customer",
@@ -34,11 +41,57 @@ class Config:
         "File",
         "Status",
         "Notes",
+        "File Hash",
     ]
+    CATEGORY_COLUMNS = ["Customer", "Equipment", "Status"]
 
 
 config = Config()
 
+# --- Extraction Patterns ---
+# Tried in order; the first label that matches wins.
+REF_PATTERNS = tuple(
+    re.compile(p, re.IGNORECASE)
+    for p in [
+        r"Route #\s*(\S+)",
+        r"Reference #\s*(\S+)",
+        r"Pro #\s*(\S+)",
+        r"Load #\s*(\S+)",
+        r"Job #\s*(\S+)",
+    ]
+)
+RATE_PATTERNS = tuple(
+    re.compile(p, re.IGNORECASE)
+    for p in [
+        r"Total Rate:\s*\$?([\d,]+\.?\d{0,2})",
+        r"Total Cost\s*\$?([\d,]+\.?\d{0,2})",
+        r"Amount:\s*\$?([\d,]+\.?\d{0,2})",
+        r"Rate:\s*\$?([\d,]+\.?\d{0,2})",
+    ]
+)
+EQUIP_PATTERNS = tuple(
+    re.compile(p, re.IGNORECASE)
+    for p in [
+        r"Equipment:\s*([^\n]+)",
+        r"Trailer Type:\s*([^\n]+)",
+        r"Equipment Type:\s*([^\n]+)",
+    ]
+)
+CONTAINER_PATTERNS = tuple(
+    re.compile(p, re.IGNORECASE)
+    for p in [
+        r"Container #:\s*(\S+)",
+        r"Container Number:\s*(\S+)",
+        r"Container ID:\s*(\S+)",
+    ]
+)
+FIELD_PATTERNS = {
+    "ref": REF_PATTERNS,
+    "rate": RATE_PATTERNS,
+    "equip": EQUIP_PATTERNS,
+    "container": CONTAINER_PATTERNS,
+}
+
 # --- Streamlit Page Setup ---
 st.set_page_config(
     page_title="RateCon Tracker", layout="wide", initial_sidebar_state="expanded"
@@ -67,8 +120,10 @@ st.markdown(
 
 
 # --- Core Data Functions ---
-@st.cache_resource
+@st.cache_resource(ttl="1h")
 def connect_to_sheet():
+    import gspread
+
     try:
         creds = st.secrets["gcp_service_account"]
         gc = gspread.service_account_from_dict(creds)
@@ -78,95 +133,248 @@ def connect_to_sheet():
         return None
 
 
-@st.cache_data(ttl=60)
+@st.cache_resource(ttl="1h")
+def get_worksheet():
+    spreadsheet = connect_to_sheet()
+    if not spreadsheet:
+        return None
+    worksheet = spreadsheet.worksheet(config.WORKSHEET_NAME)
+    # Sheets created before newer columns get their header extended once.
+    header = worksheet.row_values(1)
+    if header != config.COLUMNS and header == config.COLUMNS[: len(header)]:
+        worksheet.update(
+            values=[config.COLUMNS], range_name="A1", value_input_option="RAW"
+        )
+    return worksheet
+
+
+def read_local_cache():
+    try:
+        fetched_at = os.path.getmtime(config.LOCAL_CACHE_FILE)
+        if time.time() - fetched_at < config.LOG_TTL:
+            return fetched_at, pd.read_parquet(config.LOCAL_CACHE_FILE)
+    except (OSError, ValueError) as e:
+        if not isinstance(e, FileNotFoundError):
+            logger.warning(f"Ignoring unreadable local cache: {e}")
+    return None
+
+
+def write_local_cache(df):
+    try:
+        df.to_parquet(config.LOCAL_CACHE_FILE, index=False)
+    except Exception as e:
+        logger.warning(f"Failed to write local cache: {e}")
+
+
+@st.cache_resource
+def get_log_version():
+    # Bumped on every write so all sessions reload the log.
+    return {"value": 0}
+
+
+def invalidate_log_cache():
+    st.cache_data.clear()
+    try:
+        os.remove(config.LOCAL_CACHE_FILE)
+    except FileNotFoundError:
+        pass
+    get_log_version()["value"] += 1
+
+
+@st.cache_data(ttl=config.LOG_TTL)
 def load_log():
+    # Returns (fetched_at, df) so callers can age the data from the Sheet read.
     try:
-        spreadsheet = connect_to_sheet()
-        if spreadsheet:
-            worksheet = spreadsheet.worksheet(config.WORKSHEET_NAME)
-            df = pd.DataFrame(worksheet.get_all_records())
-            for col in config.COLUMNS:
-                if col not in df.columns:
-                    df[col] = pd.NA
-            return df[config.COLUMNS]
-        return pd.DataFrame(columns=config.COLUMNS)
+        cached = read_local_cache()
+        if cached is not None:
+            return cached
+        fetched_at = time.time()
+        worksheet = get_worksheet()
+        if worksheet:
+            values = worksheet.get_values()
+            if not values:
+                return fetched_at, pd.DataFrame(columns=config.COLUMNS)
+            df = pd.DataFrame(values[1:], columns=values[0]).reindex(
+                columns=config.COLUMNS, fill_value=""
+            )
+            df = df.astype({col: "category" for col in config.CATEGORY_COLUMNS})
+            write_local_cache(df)
+            return fetched_at, df
+        return fetched_at, pd.DataFrame(columns=config.COLUMNS)
     except Exception as e:
         st.error(f"Error loading data from Google Sheet: {e}")
-        return pd.DataFrame(columns=config.COLUMNS)
+        return time.time(), pd.DataFrame(columns=config.COLUMNS)
+
+
+def get_log_df():
+    version = get_log_version()["value"]
+    cached = st.session_state.get("log_df")
+    if (
+        cached is None
+        or cached[1] != version
+        or time.time() - cached[0] >= config.LOG_TTL
+    ):
+        fetched_at, df = load_log()
+        if time.time() - fetched_at >= config.LOG_TTL:
+            # The memoized copy outlived the read it came from.
+            load_log.clear()
+            fetched_at, df = load_log()
+        cached = (fetched_at, version, df)
+        st.session_state.log_df = cached
+        st.session_state.pop("log_proc", None)
+    return cached[2]
 
 
 def update_sheet(df):
     try:
-        spreadsheet = connect_to_sheet()
-        if spreadsheet:
-            worksheet = spreadsheet.worksheet(config.WORKSHEET_NAME)
-            worksheet.clear()
-            set_with_dataframe(worksheet, df)
+        worksheet = get_worksheet()
+        if worksheet:
+            cells = df.astype(object).fillna("").astype(str)
+            rows = [df.columns.tolist()] + cells.values.tolist()
+            worksheet.update(
+                values=rows, range_name="A1", value_input_option="USER_ENTERED"
+            )
+            # Clear everything below the data, including rows added elsewhere.
+            worksheet.batch_clear([f"A{len(rows) + 1}:ZZ"])
             logger.info("Google Sheet updated.")
-            st.cache_data.clear()
+            invalidate_log_cache()
     except Exception as e:
         st.error(f"Failed to update Google Sheet: {e}")
 
 
-def append_to_sheet(new_records_df):
+def delete_sheet_rows(refs_to_delete):
     try:
-        spreadsheet = connect_to_sheet()
-        if spreadsheet:
-            worksheet = spreadsheet.worksheet(config.WORKSHEET_NAME)
-            worksheet.append_rows(
-                new_records_df.values.tolist(), value_input_option="USER_ENTERED"
-            )
-            logger.info(f"Appended {len(new_records_df)} records.")
-            st.cache_data.clear()
+        worksheet = get_worksheet()
+        if worksheet:
+            # Fresh read, so row numbers match the sheet as it is now.
+            ref_col = config.COLUMNS.index("Reference #") + 1
+            refs = set(refs_to_delete)
+            rows = [
+                row
+                for row, value in enumerate(worksheet.col_values(ref_col), start=1)
+                if row > 1 and value in refs
+            ]
+            # Bottom-up so earlier indices stay valid.
+            requests = [
+                {
+                    "deleteDimension": {
+                        "range": {
+                            "sheetId": worksheet.id,
+                            "dimension": "ROWS",
+                            "startIndex": row - 1,
+                            "endIndex": row,
+                        }
+                    }
+                }
+                for row in reversed(rows)
+            ]
+            if requests:
+                worksheet.spreadsheet.batch_update({"requests": requests})
+            logger.info(f"Deleted {len(rows)} rows.")
+            invalidate_log_cache()
+    except Exception as e:
+        st.error(f"Failed to delete rows from Google Sheet: {e}")
+
+
+def append_to_sheet(new_records):
+    try:
+        worksheet = get_worksheet()
+        if worksheet:
+            values = [[record[col] for col in config.COLUMNS] for record in new_records]
+            for start in range(0, len(values), config.APPEND_CHUNK_SIZE):
+                worksheet.append_rows(
+                    values[start : start + config.APPEND_CHUNK_SIZE],
+                    value_input_option="USER_ENTERED",
+                    insert_data_option="INSERT_ROWS",
+                )
+            logger.info(f"Appended {len(new_records)} records.")
+            invalidate_log_cache()
     except Exception as e:
         st.error(f"Failed to append to Google Sheet: {e}")
 
 
+@st.cache_resource
+def get_extraction_cache():
+    # Content digest -> extracted fields, shared across sessions.
+    return {}
+
+
 # --- Helper Functions ---
-def extract_data_from_pdf(pdf_bytes):
+def pdf_digest(pdf_bytes):
+    return hashlib.blake2b(pdf_bytes, digest_size=16).hexdigest()
+
+
+def iter_page_text(pdf_bytes):
     try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        pdfium = None
+
+    if pdfium is None:
+        import pdfplumber
+
         with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
-            text = "\n".join(
-                p.extract_text() for p in pdf.pages if p.extract_text() or ""
-            )
-        ref_patterns, rate_patterns, equip_patterns, container_patterns = (
-            [
-                r"Route #\s*(\S+)",
-                r"Reference #\s*(\S+)",
-                r"Pro #\s*(\S+)",
-                r"Load #\s*(\S+)",
-                r"Job #\s*(\S+)",
-            ],
-            [
-                r"Total Rate:\s*\$?([\d,]+\.?\d{0,2})",
-                r"Total Cost\s*\$?([\d,]+\.?\d{0,2})",
-                r"Amount:\s*\$?([\d,]+\.?\d{0,2})",
-                r"Rate:\s*\$?([\d,]+\.?\d{0,2})",
-            ],
-            [
-                r"Equipment:\s*([^\n]+)",
-                r"Trailer Type:\s*([^\n]+)",
-                r"Equipment Type:\s*([^\n]+)",
-            ],
-            [
-                r"Container #:\s*(\S+)",
-                r"Container Number:\s*(\S+)",
-                r"Container ID:\s*(\S+)",
-            ],
-        )
+            for page in pdf.pages:
+                text = page.extract_text()
+                if text:
+                    yield text
+        return
+
+    pdf = pdfium.PdfDocument(pdf_bytes)
+    try:
+        for page in pdf:
+            textpage = page.get_textpage()
+            text = textpage.get_text_range()
+            textpage.close()
+            page.close()
+            if text:
+                yield text.replace("\r\n", "\n")
+    finally:
+        pdf.close()
+
+
+def find_match(patterns, text, before=None):
+    # Returns (rank, value) for the first label that matches, else None. Matches
+    # starting at or after `before` are skipped.
+    for rank, pattern in enumerate(patterns):
+        match = pattern.search(text)
+        if match and (before is None or match.start() < before):
+            return rank, match.group(1).strip()
+    return None
 
-        def find_match(patterns, text):
-            for pattern in patterns:
-                match = re.search(pattern, text, re.IGNORECASE)
+
+def extract_data_from_pdf(pdf_bytes):
+    try:
+        # Each page is searched once, behind the previous page's last line. A
+        # label on a page's last line may take its value from the next page, so
+        # it's only matched in that next search. Only labels that beat the
+        # current match are tried, and the loop stops once all four are top rank.
+        found, carry = {}, ""
+
+        def search(text, before=None):
+            for field, patterns in FIELD_PATTERNS.items():
+                rank = found[field][0] if field in found else len(patterns)
+                match = find_match(patterns[:rank], text, before)
                 if match:
-                    return match.group(1).strip()
-            return None
+                    found[field] = match
+
+        pages = iter_page_text(pdf_bytes)
+        for page_text in pages:
+            text = f"{carry}\n{page_text}" if carry else page_text
+            last_line = text.rstrip().rfind("\n") + 1
+            search(text, last_line)
+            carry = text[last_line:]
+            if len(found) == len(FIELD_PATTERNS) and all(
+                rank == 0 for rank, _ in found.values()
+            ):
+                break
+        else:
+            search(carry)
+        pages.close()
 
         ref, rate, equip, container = (
-            find_match(ref_patterns, text),
-            find_match(rate_patterns, text),
-            find_match(equip_patterns, text),
-            find_match(container_patterns, text),
+            found[field][1] if field in found else None
+            for field in ("ref", "rate", "equip", "container")
         )
         return (
             ref if ref else "Unknown",
@@ -179,62 +387,131 @@ def extract_data_from_pdf(pdf_bytes):
         return "Unknown", "0.00", "None", ""
 
 
+def extract_in_workers(to_parse, progress_bar):
+    # Processes, not threads: pdfium isn't thread-safe, and a crash in it only
+    # takes down a worker. Returns digest -> fields for the PDFs that parsed.
+    results, total = {}, len(to_parse)
+
+    def report():
+        progress_bar.progress(
+            len(results) / total, text=f"Processed {len(results)} of {total}"
+        )
+
+    max_workers = min(total, os.cpu_count() or 1, config.MAX_WORKERS)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(extract_data_from_pdf, pdf_bytes): digest
+            for digest, pdf_bytes in to_parse.items()
+        }
+        for future in as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+                report()
+            except Exception as e:
+                logger.error(f"PDF extraction worker failed: {e}")
+
+    # A dead worker breaks every pending future, so the unfinished files are
+    # retried one per pool to isolate the one that crashed.
+    for digest, pdf_bytes in to_parse.items():
+        if digest in results:
+            continue
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            try:
+                results[digest] = executor.submit(
+                    extract_data_from_pdf, pdf_bytes
+                ).result()
+                report()
+            except Exception as e:
+                logger.error(f"PDF extraction failed after retry: {e}")
+    return results
+
+
 @st.cache_data
 def process_dataframe(df):
+    # Returns (df_proc, chassis_dist, equip_dist).
     if df.empty:
-        return df
-    df_proc = df.copy()
-    df_proc["Parsed Rate"] = pd.to_numeric(
-        df_proc["Rate"].astype(str).str.replace("[$,]", "", regex=True), errors="coerce"
-    ).fillna(0)
-    df_proc["Chassis Count"] = (
-        (df_proc["Parsed Rate"] - config.DRAYAGE_RATE) / config.CHASSIS_RATE
-    ).apply(lambda x: max(round(x), 0))
-    df_proc["Expected Rate"] = (
-        config.DRAYAGE_RATE + df_proc["Chassis Count"] * config.CHASSIS_RATE
+        return df, pd.Series(dtype="int64"), pd.Series(dtype="int64")
+    rates = df["Rate"].astype(str)
+    rates = rates.str.replace("$", "", regex=False).str.replace(",", "", regex=False)
+    parsed = pd.to_numeric(rates, errors="coerce").fillna(0).to_numpy()
+    # np.rint rounds half to even, like round().
+    raw_chassis = np.rint((parsed - config.DRAYAGE_RATE) / config.CHASSIS_RATE)
+    chassis = np.maximum(raw_chassis, 0).astype(np.int64)
+    expected = config.DRAYAGE_RATE + chassis * config.CHASSIS_RATE
+    df_proc = df.assign(
+        **{
+            "Parsed Rate": parsed,
+            "Chassis Count": chassis,
+            "Expected Rate": expected,
+            "Mismatch": parsed != expected,
+        }
     )
-    df_proc["Mismatch"] = df_proc["Parsed Rate"] != df_proc["Expected Rate"]
-    return df_proc
-
+    chassis_dist = df_proc["Chassis Count"].value_counts().sort_index()
+    equip_dist = df_proc["Equipment"].value_counts().nlargest(10)
+    return df_proc, chassis_dist, equip_dist
 
-@st.cache_data
-def convert_df_to_csv(df):
-    df_to_export = process_dataframe(df)
-    return df_to_export.to_csv(index=False).encode("utf-8")
 
+@st.cache_data(max_entries=2)
+def convert_df_to_csv(df_to_export):
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
 
-@st.cache_data
-def convert_df_to_excel(df):
-    df_to_export = process_dataframe(df)
     output = BytesIO()
-    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-        df_to_export.to_excel(writer, index=False, sheet_name="RateCons")
+    pa_csv.write_csv(pa.Table.from_pandas(df_to_export, preserve_index=False), output)
+    return output.getvalue()
 
-        workbook = writer.book
-        worksheet = writer.sheets["RateCons"]
 
-        red_format = workbook.add_format(
-            {"bg_color": "#FFC7CE", "font_color": "#9C0006"}
-        )
+@st.cache_data(max_entries=2)
+def convert_df_to_excel(df_to_export):
+    import xlsxwriter
+    from xlsxwriter.utility import xl_col_to_name
 
-        try:
-            # Apply the format to rows where Mismatch is True
-            for row_num, is_mismatch in enumerate(df_to_export["Mismatch"]):
-                if is_mismatch:
-                    worksheet.set_row(row_num + 1, None, red_format)
-        except KeyError:
-            # If Mismatch column doesn't exist for some reason, do nothing.
-            pass
+    # constant_memory needs rows written in order, so no df.to_excel.
+    output = BytesIO()
+    workbook = xlsxwriter.Workbook(
+        output, {"constant_memory": True, "strings_to_urls": False}
+    )
+    worksheet = workbook.add_worksheet("RateCons")
+    header_format = workbook.add_format(
+        {"bold": True, "border": 1, "align": "center", "valign": "top"}
+    )
+    red_format = workbook.add_format({"bg_color": "#FFC7CE", "font_color": "#9C0006"})
+
+    worksheet.write_row(0, 0, df_to_export.columns.tolist(), header_format)
+    cells = df_to_export.astype(object).where(df_to_export.notna(), None)
+    for row_num, row in enumerate(cells.values.tolist(), start=1):
+        worksheet.write_row(row_num, 0, row)
+
+    # Apply the format to rows where Mismatch is True
+    if "Mismatch" in df_to_export.columns and len(df_to_export):
+        mismatch_col = xl_col_to_name(df_to_export.columns.get_loc("Mismatch"))
+        worksheet.conditional_format(
+            1,
+            0,
+            len(df_to_export),
+            len(df_to_export.columns) - 1,
+            {"type": "formula", "criteria": f"=${mismatch_col}2", "format": red_format},
+        )
+    workbook.close()
 
     return output.getvalue()
 
 
-# --- UI Rendering Functions ---
-def render_metrics(df):
+@st.cache_data
+def get_dedup_sets(df):
     if df.empty:
+        return frozenset(), frozenset(), frozenset()
+    return tuple(
+        frozenset(df[col].dropna().astype(str).to_numpy()) - {""}
+        for col in ["Reference #", "File", "File Hash"]
+    )
+
+
+# --- UI Rendering Functions ---
+def render_metrics(df_proc):
+    if df_proc.empty:
         st.info("No data available to display metrics.")
         return
-    df_proc = process_dataframe(df)
     total_loads, total_revenue = len(df_proc), df_proc["Parsed Rate"].sum()
     avg_rate_per_load = total_revenue / total_loads if total_loads > 0 else 0
     drayage_revenue, chassis_revenue = (
@@ -275,10 +552,11 @@ def render_metrics(df):
     )
 
 
-def render_charts(df):
-    if df.empty:
+def render_charts(chassis_dist, equip_dist):
+    import plotly.graph_objects as go
+
+    if chassis_dist.empty and equip_dist.empty:
         return
-    df_proc = process_dataframe(df)
 
     plotly_template = (
         "plotly_dark" if st.get_option("theme.base") == "dark" else "plotly_white"
@@ -286,33 +564,41 @@ def render_charts(df):
 
     col1, col2 = st.columns(2)
     with col1:
-        chassis_dist = df_proc["Chassis Count"].value_counts().sort_index()
         if not chassis_dist.empty:
-            fig = px.bar(
-                chassis_dist,
-                title="Loads by Chassis Count",
-                labels={"index": "Chassis Count", "value": "Number of Loads"},
-                template=plotly_template,
+            fig = go.Figure(
+                go.Bar(x=chassis_dist.index.to_numpy(), y=chassis_dist.to_numpy()),
+                layout=dict(
+                    title="Loads by Chassis Count",
+                    xaxis_title="Chassis Count",
+                    yaxis_title="Number of Loads",
+                    template=plotly_template,
+                ),
             )
             st.plotly_chart(fig, use_container_width=True)
     with col2:
-        equip_dist = df_proc["Equipment"].value_counts().nlargest(10)
         if not equip_dist.empty:
-            fig = px.bar(
-                equip_dist,
-                title="Top 10 Loads by Equipment Type",
-                labels={"index": "Equipment Type", "value": "Number of Loads"},
-                template=plotly_template,
+            fig = go.Figure(
+                go.Bar(x=equip_dist.index.to_numpy(), y=equip_dist.to_numpy()),
+                layout=dict(
+                    title="Top 10 Loads by Equipment Type",
+                    xaxis_title="Equipment Type",
+                    yaxis_title="Number of Loads",
+                    template=plotly_template,
+                ),
             )
             st.plotly_chart(fig, use_container_width=True)
 
 
-def render_data_table(df):
-    if df.empty:
+def render_data_table(df_proc):
+    if df_proc.empty:
         return
-    df_proc = process_dataframe(df)
-    df_proc["Notes"] = df_proc.apply(
-        lambda row: "⚠️ Rate Mismatch" if row["Mismatch"] else row["Notes"], axis=1
+    # df_proc is shared with the other sections, so don't mutate it.
+    df_proc = df_proc.assign(
+        Notes=np.where(
+            df_proc["Mismatch"].to_numpy(),
+            "⚠️ Rate Mismatch",
+            df_proc["Notes"].to_numpy(dtype=object),
+        )
     )
 
     display_cols = [
@@ -337,56 +623,108 @@ def render_data_table(df):
     )
 
 
+@st.fragment
+def render_export(df_proc):
+    st.subheader("Export Data")
+    c1, c2, _ = st.columns([1, 1, 4])
+    with c1:
+        export_format = st.selectbox(
+            "Format", ["CSV", "Excel"], label_visibility="collapsed"
+        )
+    with c2:
+        file_name_base = f"ratecon_export_{datetime.now().strftime('%Y%m%d')}"
+        # The file is only built when the button is clicked.
+        if export_format == "Excel":
+            label, data, mime, ext = (
+                "📥 Export to Excel",
+                lambda: convert_df_to_excel(df_proc),
+                "application/vnd.ms-excel",
+                "xlsx",
+            )
+        else:
+            label, data, mime, ext = (
+                "📥 Export to CSV",
+                lambda: convert_df_to_csv(df_proc),
+                "text/csv",
+                "csv",
+            )
+
+        st.download_button(
+            label=label,
+            data=data,
+            file_name=f"{file_name_base}.{ext}",
+            mime=mime,
+        )
+
+
 # --- Callback Functions ---
 def run_file_processing(uploaded_files):
     if not uploaded_files:
         st.warning("Please upload files before processing.")
         return
 
-    existing_df = load_log()
-    new_records, skipped_files = [], []
-    existing_refs, existing_files = (
-        (
-            set(existing_df["Reference #"].astype(str)),
-            set(existing_df["File"].astype(str)),
-        )
-        if not existing_df.empty
-        else (set(), set())
-    )
+    existing_refs, existing_files, existing_hashes = get_dedup_sets(get_log_df())
+    new_records, skipped_files, batch_refs = [], [], set()
 
     progress_bar_placeholder = st.empty()
     progress_bar = progress_bar_placeholder.progress(0, text="Initializing...")
 
-    for i, file in enumerate(uploaded_files):
-        progress_bar.progress(
-            (i + 1) / len(uploaded_files), text=f"Processing: {file.name}"
-        )
+    pending = []
+    batch_hashes = set()
+    for file in uploaded_files:
         if file.name in existing_files:
             skipped_files.append({"file": file.name, "reason": "Duplicate filename."})
             continue
-        ref, rate, equip, container = extract_data_from_pdf(file.getvalue())
+        pdf_bytes = file.getvalue()
+        digest = pdf_digest(pdf_bytes)
+        if digest in existing_hashes or digest in batch_hashes:
+            skipped_files.append({"file": file.name, "reason": "Duplicate file."})
+            continue
+        batch_hashes.add(digest)
+        pending.append((file.name, digest, pdf_bytes))
+
+    cache = get_extraction_cache()
+    results = {digest: cache[digest] for _, digest, _ in pending if digest in cache}
+    to_parse = {
+        digest: pdf_bytes for _, digest, pdf_bytes in pending if digest not in results
+    }
+    if to_parse:
+        results.update(extract_in_workers(to_parse, progress_bar))
+    for digest in to_parse:
+        if digest in results:
+            cache[digest] = results[digest]
+    while len(cache) > config.EXTRACTION_CACHE_SIZE:
+        cache.pop(next(iter(cache)), None)
+
+    date_added = datetime.now().date().isoformat()
+    for name, digest, _ in pending:
+        if digest not in results:
+            skipped_files.append({"file": name, "reason": "Extraction failed."})
+            continue
+        ref, rate, equip, container = results[digest]
         if ref == "Unknown":
-            skipped_files.append({"file": file.name, "reason": "Unsupported Format."})
+            skipped_files.append({"file": name, "reason": "Unsupported Format."})
             continue
-        if ref in existing_refs:
+        if ref in existing_refs or ref in batch_refs:
             skipped_files.append(
-                {"file": file.name, "reason": f"Duplicate Reference # {ref}"}
+                {"file": name, "reason": f"Duplicate Reference # {ref}"}
             )
             continue
         new_records.append(
             {
-                "Date Added": datetime.now().strftime("%Y-%m-%d"),
+                "Date Added": date_added,
                 "Customer": config.DEFAULT_CUSTOMER,
                 "Reference #": ref,
                 "Equipment": equip,
                 "Container #": container,
                 "Rate": rate,
-                "File": file.name,
-                "Status": "Active",
+                "File": name,
+                "Status": config.DEFAULT_STATUS,
                 "Notes": "",
+                "File Hash": digest,
             }
         )
-        existing_refs.add(ref)
+        batch_refs.add(ref)
 
     progress_bar_placeholder.empty()
     st.session_state.processed_records = new_records
@@ -398,7 +736,7 @@ def run_file_processing(uploaded_files):
 def run_save_records():
     new_records = st.session_state.get("processed_records", [])
     if new_records:
-        append_to_sheet(pd.DataFrame(new_records))
+        append_to_sheet(new_records)
         st.toast(
             f"✅ Success! Added {len(new_records)} new records to the log.", icon="🎉"
         )
@@ -412,7 +750,7 @@ def run_save_records():
 
 def run_delete_selected(refs_to_delete):
     if refs_to_delete:
-        update_sheet(load_log()[~load_log()["Reference #"].isin(refs_to_delete)])
+        delete_sheet_rows(refs_to_delete)
         st.toast(f"Deleted {len(refs_to_delete)} records.", icon="🗑️")
         st.session_state.needs_rerun = True
 
@@ -466,7 +804,7 @@ def main():
                 use_container_width=True,
             )
 
-    df = load_log()
+    df = get_log_df()
 
     if active_tab == "upload":
         with st.container():
@@ -521,46 +859,19 @@ def main():
                     st.info("No new, valid records were found to be added.")
 
     elif active_tab == "dashboard":
+        if "log_proc" not in st.session_state:
+            st.session_state.log_proc = process_dataframe(df)
+        df_proc, chassis_dist, equip_dist = st.session_state.log_proc
         with st.container():
-            render_metrics(df)
+            render_metrics(df_proc)
         with st.container():
-            render_charts(df)
+            render_charts(chassis_dist, equip_dist)
         with st.container():
             st.subheader("Full Data Log")
-            render_data_table(df)
+            render_data_table(df_proc)
         if not df.empty:
             with st.container():
-                st.subheader("Export Data")
-                c1, c2, _ = st.columns([1, 1, 4])
-                with c1:
-                    export_format = st.selectbox(
-                        "Format", ["Excel", "CSV"], label_visibility="collapsed"
-                    )
-                with c2:
-                    file_name_base = (
-                        f"ratecon_export_{datetime.now().strftime('%Y%m%d')}"
-                    )
-                    if export_format == "Excel":
-                        label, data, mime, ext = (
-                            "📥 Export to Excel",
-                            convert_df_to_excel(df),
-                            "application/vnd.ms-excel",
-                            "xlsx",
-                        )
-                    else:
-                        label, data, mime, ext = (
-                            "📥 Export to CSV",
-                            convert_df_to_csv(df),
-                            "text/csv",
-                            "csv",
-                        )
-
-                    st.download_button(
-                        label=label,
-                        data=data,
-                        file_name=f"{file_name_base}.{ext}",
-                        mime=mime,
-                    )
+                render_export(df_proc)
 
     elif active_tab == "manage":
         if df.empty: